@@ -8,7 +8,7 @@ from http import HTTPStatus
 from aiohttp import web
 from botbuilder.core.integration import aiohttp_error_middleware
 
-from bot import bot_app
+from bot import bot_app, feedback_ingestor
 
 routes = web.RouteTableDef()
 
@@ -21,8 +21,17 @@ async def on_messages(req: web.Request) -> web.Response:
 
     return web.Response(status=HTTPStatus.OK)
 
+async def start_feedback_ingestor(_app: web.Application) -> None:
+    await feedback_ingestor.start()
+
+async def stop_feedback_ingestor(_app: web.Application) -> None:
+    # Flush queued feedback before the process exits.
+    await feedback_ingestor.stop()
+
 app = web.Application(middlewares=[aiohttp_error_middleware])
 app.add_routes(routes)
+app.on_startup.append(start_feedback_ingestor)
+app.on_cleanup.append(stop_feedback_ingestor)
 
 from config import Config
 
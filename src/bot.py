@@ -1,12 +1,10 @@
 import os
 import sys
 import traceback
-import json
 import aiohttp
 import asyncio
 import time
 from typing import Any, Dict, Optional
-from dataclasses import asdict
 
 # 嘗試匯入 Azure AI Projects SDK
 try:
@@ -27,6 +25,7 @@ from teams.state import TurnState
 from teams.feedback_loop_data import FeedbackLoopData
 
 from config import Config
+from feedback import AnswerIndex, FeedbackIngestor, FeedbackStore, FeedbackTrackingAdapter, begin_answer, set_backend_tier
 
 config = Config()
 
@@ -38,16 +37,30 @@ planner = AssistantsPlanner[TurnState](
         assistant_id=config.AZURE_OPENAI_ASSISTANT_ID)
 )
 
+feedback_ingestor = FeedbackIngestor(
+    store=FeedbackStore(config.FEEDBACK_STORE_PATH, config.FEEDBACK_MAX_BYTES, config.FEEDBACK_BACKUP_COUNT),
+    answers=AnswerIndex(config.FEEDBACK_ANSWER_CACHE_SIZE),
+    queue_size=config.FEEDBACK_QUEUE_SIZE,
+    batch_size=config.FEEDBACK_BATCH_SIZE,
+    flush_interval=config.FEEDBACK_FLUSH_INTERVAL,
+)
+
 # Define storage and application
 storage = MemoryStorage()
 bot_app = Application[TurnState](
     ApplicationOptions(
         bot_app_id=config.APP_ID,
         storage=storage,
-        adapter=TeamsAdapter(config),
+        adapter=FeedbackTrackingAdapter(config, feedback_ingestor),
         ai=AIOptions(planner=planner, enable_feedback_loop=True),
     )
 )
+
+@bot_app.before_turn
+async def track_answer(context: TurnContext, _state: TurnState) -> bool:
+    # 記錄問題與開始時間，讓回饋能連結到對應回答的後端與延遲
+    begin_answer(context)
+    return True
     
 @bot_app.ai.action("getCurrentWeather")
 async def get_current_weather(context: TurnContext, state: TurnState):
@@ -120,6 +133,7 @@ async def call_azure_ai_foundry_agent_sdk(question: str) -> str:
     """使用 Azure AI Projects SDK 呼叫 Agent"""
     try:
         print(f"調試 - 使用 Azure AI Projects SDK 呼叫 Agent")
+        set_backend_tier("foundry_agent_sdk")
         
         # 根據成功範例，使用正確的初始化方式
         project_connection_string = config.PROJECT_CONNECTION_STRING
@@ -286,6 +300,7 @@ async def call_azure_ai_foundry_agent_sdk(question: str) -> str:
 
 async def call_azure_ai_foundry_agent(question: str, headers: dict) -> str:
     """使用 Azure AI Foundry Agent API 呼叫"""
+    set_backend_tier("foundry_agent_rest")
     try:
         base_endpoint = config.AZURE_AI_FOUNDRY_ENDPOINT.rstrip('/')
         
@@ -355,6 +370,7 @@ async def call_azure_ai_foundry_agent(question: str, headers: dict) -> str:
 
 async def call_azure_openai_model(question: str, headers: dict) -> str:
     """使用標準 Azure OpenAI Model API 呼叫"""
+    set_backend_tier("foundry_model_rest")
     try:
         base_endpoint = config.AZURE_AI_FOUNDRY_ENDPOINT.rstrip('/')
         endpoint = f"{base_endpoint}/openai/deployments/{config.AZURE_AI_FOUNDRY_MODEL_NAME}/chat/completions?api-version=2024-02-15-preview"
@@ -516,6 +532,6 @@ async def on_error(context: TurnContext, error: Exception):
     await context.send_activity("The agent encountered an error or bug.")
 
 @bot_app.feedback_loop()
-async def feedback_loop(_context: TurnContext, _state: TurnState, feedback_loop_data: FeedbackLoopData):
-    # Add custom feedback process logic here.
-    print(f"Your feedback is:\n{json.dumps(asdict(feedback_loop_data), indent=4)}")
\ No newline at end of file
+async def feedback_loop(context: TurnContext, _state: TurnState, feedback_loop_data: FeedbackLoopData):
+    # Only enqueue here; the background writer persists the record off the turn.
+    feedback_ingestor.enqueue(context, feedback_loop_data)
\ No newline at end of file
@@ -32,3 +32,12 @@ class Config:
     PROJECT_CONNECTION_STRING = os.environ.get("PROJECT_CONNECTION_STRING", "")
     # 使用基礎端點，讓 SDK 自動處理路徑
     PROJECT_ENDPOINT = os.environ.get("PROJECT_ENDPOINT", "https://aiagent-3799-resource.services.ai.azure.com")
+
+    # Feedback ingestion
+    FEEDBACK_STORE_PATH = os.environ.get("FEEDBACK_STORE_PATH", os.path.join("feedback", "feedback.jsonl")) # Append-only JSONL store
+    FEEDBACK_MAX_BYTES = int(os.environ.get("FEEDBACK_MAX_BYTES", 10 * 1024 * 1024)) # Rotate the store once it reaches this size
+    FEEDBACK_BACKUP_COUNT = int(os.environ.get("FEEDBACK_BACKUP_COUNT", 5)) # Number of rotated files to keep
+    FEEDBACK_QUEUE_SIZE = int(os.environ.get("FEEDBACK_QUEUE_SIZE", 1000)) # Records beyond this are dropped instead of blocking the turn
+    FEEDBACK_BATCH_SIZE = int(os.environ.get("FEEDBACK_BATCH_SIZE", 50)) # Records written per batch
+    FEEDBACK_FLUSH_INTERVAL = float(os.environ.get("FEEDBACK_FLUSH_INTERVAL", 2.0)) # Seconds a partial batch waits before being written
+    FEEDBACK_ANSWER_CACHE_SIZE = int(os.environ.get("FEEDBACK_ANSWER_CACHE_SIZE", 5000)) # Recent answers kept to link feedback to
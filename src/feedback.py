@@ -0,0 +1,200 @@
+"""
+Non-blocking feedback ingestion.
+
+The feedback loop handler only enqueues records; a background writer batches
+them into a local append-only JSONL store with size based rotation, so rating
+an answer never adds latency to the turn. Each record is linked to the
+question, backend tier and latency of the answer it rates.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from botbuilder.core import TurnContext
+from botbuilder.schema import Activity, ActivityTypes, ResourceResponse
+from teams import TeamsAdapter
+from teams.feedback_loop_data import FeedbackLoopData
+
+ANSWER_STATE_KEY = "feedback_answer"
+DEFAULT_BACKEND_TIER = "assistant"
+
+_STOP = object()
+
+_current_answer: ContextVar[Optional[Dict[str, Any]]] = ContextVar("current_answer", default=None)
+
+def begin_answer(context: TurnContext) -> None:
+    """Start tracking the answer of an incoming message turn."""
+    if context.activity.type != ActivityTypes.message:
+        return
+    answer = {
+        "question": context.activity.text or "",
+        "backend_tier": DEFAULT_BACKEND_TIER,
+        "started_at": time.monotonic(),
+    }
+    context.turn_state[ANSWER_STATE_KEY] = answer
+    _current_answer.set(answer)
+
+def set_backend_tier(tier: str) -> None:
+    """Record which backend produced the answer of the current turn; the last call wins."""
+    answer = _current_answer.get()
+    if answer is not None:
+        answer["backend_tier"] = tier
+
+class AnswerIndex:
+    """Bounded map from sent reply activity IDs to the answer they carried."""
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._answers: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def add(self, reply_id: str, answer: Dict[str, Any]) -> None:
+        self._answers[reply_id] = answer
+        self._answers.move_to_end(reply_id)
+        while len(self._answers) > self._max_entries:
+            self._answers.popitem(last=False)
+
+    def get(self, reply_id: str) -> Optional[Dict[str, Any]]:
+        return self._answers.get(reply_id)
+
+class FeedbackStore:
+    """Append-only JSONL file, rotated to `<path>.1` ... `<path>.<backup_count>` when it grows past max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def append(self, records: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self._should_rotate():
+            self._rotate()
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _should_rotate(self) -> bool:
+        return self.max_bytes > 0 and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes
+
+    def _rotate(self) -> None:
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+class FeedbackIngestor:
+    """Bounded in-memory queue drained in batches by a background writer task."""
+
+    def __init__(self, store: FeedbackStore, answers: AnswerIndex, queue_size: int, batch_size: int, flush_interval: float):
+        self.store = store
+        self.answers = answers
+        # A zero queue size would make asyncio.Queue unbounded and a zero batch size would spin the writer.
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue_size = max(1, queue_size)
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._writer is None:
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+            self._writer = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything still queued and stop the writer."""
+        if self._writer is None:
+            return
+        await self._queue.put(_STOP)
+        await self._writer
+        self._writer = None
+        self._queue = None
+
+    def track_answers(self, context: TurnContext, activities: List[Activity], responses: List[ResourceResponse]) -> None:
+        answer = context.turn_state.get(ANSWER_STATE_KEY)
+        if answer is None:
+            return
+        latency_ms = int((time.monotonic() - answer["started_at"]) * 1000)
+        for activity, response in zip(activities, responses or []):
+            if activity.type == ActivityTypes.message and response is not None and response.id:
+                self.answers.add(response.id, {
+                    "question": answer["question"],
+                    "backend_tier": answer["backend_tier"],
+                    "latency_ms": latency_ms,
+                })
+
+    def enqueue(self, context: TurnContext, feedback_loop_data: FeedbackLoopData) -> bool:
+        """Queue a feedback record without waiting; returns False when the queue is full or not started."""
+        record = {
+            "received_at": time.time(),
+            "conversation_id": context.activity.conversation.id if context.activity.conversation else None,
+            "user_id": context.activity.from_property.id if context.activity.from_property else None,
+            **asdict(feedback_loop_data),
+            "answer": self.answers.get(feedback_loop_data.reply_to_id),
+        }
+        if self._queue is None:
+            self.dropped += 1
+            print(f"Feedback writer is not running, dropped {self.dropped} record(s) so far")
+            return False
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            print(f"Feedback queue is full, dropped {self.dropped} record(s) so far")
+            return False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                if deadline is None:
+                    record = await self._queue.get()
+                    deadline = time.monotonic() + self.flush_interval
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        record = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+            await self._write(batch)
+
+    async def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.append, batch)
+        except Exception as e:
+            print(f"Failed to write {len(batch)} feedback record(s): {e}")
+
+class FeedbackTrackingAdapter(TeamsAdapter):
+    """TeamsAdapter that remembers which answer each sent reply carried, keyed by its activity ID."""
+
+    def __init__(self, configuration, ingestor: FeedbackIngestor, *args, **kwargs):
+        super().__init__(configuration, *args, **kwargs)
+        self.ingestor = ingestor
+
+    async def send_activities(self, context: TurnContext, activities: List[Activity]) -> List[ResourceResponse]:
+        responses = await super().send_activities(context, activities)
+        self.ingestor.track_answers(context, activities, responses)
+        return responses
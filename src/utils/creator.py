@@ -1,24 +1,31 @@
-import asyncio, os, argparse
-from teams.ai.planners import AssistantsPlanner
+import asyncio, os, argparse, hashlib, json, sys, time
+from openai import AsyncAzureOpenAI, NotFoundError
 from openai.types.beta import AssistantCreateParams
 from openai.types.beta.function_tool_param import FunctionToolParam
 from openai.types.shared_params import FunctionDefinition
 
-from dotenv import load_dotenv
+from dotenv import dotenv_values, set_key
 
-load_dotenv(f'{os.getcwd()}/env/.env.local.user', override=True)
+ASSISTANT_NAME = "Assistant"
+API_VERSION = "2024-02-15-preview"
+HASH_METADATA_KEY = "definition_hash"
+NAME_METADATA_KEY = "definition_name"
+ENV_METADATA_KEY = "definition_env"
 
 def load_keys_from_args():
-    parser = argparse.ArgumentParser(description='Load keys from command input parameters.')
-    parser.add_argument('--api-key', type=str, required=True, help='Azure OpenAI API key for authentication')
+    parser = argparse.ArgumentParser(description='Create or update the assistant for one or more environments.')
+    parser.add_argument('--api-key', type=str, help='Azure OpenAI API key for authentication (defaults to SECRET_AZURE_OPENAI_API_KEY of each environment)')
+    parser.add_argument('--env', type=str, nargs='+', default=['local'], help='Environments to sync, read from env/.env.<name> and env/.env.<name>.user')
+    parser.add_argument('--output', type=str, default=os.path.join('env', '.assistants.json'), help='Machine-readable result file, also used to skip unchanged environments')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of environments synced at the same time')
+    parser.add_argument('--force', action='store_true', help='Ignore the result file and check every environment against the service; needed after the assistant or env files were changed outside this tool')
+    parser.add_argument('--write-env', action='store_true', help='Write AZURE_OPENAI_ASSISTANT_ID back into env/.env.<name>.user')
     args = parser.parse_args()
     return args
 
-async def main():
-    args = load_keys_from_args()
-
-    options = AssistantCreateParams(
-        name="Assistant",
+def build_options(model):
+    return AssistantCreateParams(
+        name=ASSISTANT_NAME,
         instructions="\n".join([
             "You are an intelligent agent that can",
             "- write and run code to answer math questions",
@@ -83,20 +90,159 @@ async def main():
                         "required": ["question"],
                     }
                 )
-            )            
+            )
         ],
-        model=os.getenv("AZURE_OPENAI_MODEL_DEPLOYMENT_NAME"),
+        model=model,
     )
 
-    assistant = await AssistantsPlanner.create_assistant(
-        api_key=args.api_key,
-        azure_ad_token_provider=None,
-        api_version="", 
-        organization="", 
-        endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"), 
-        request=options
-    )
-    print(assistant.tools)
-    print(f"Created a new assistant with an ID of: {assistant.id}")
+def definition_hash(options):
+    """Stable hash of everything that defines the assistant (name, instructions, tools, model)."""
+    definition = {key: options.get(key) for key in ("name", "instructions", "tools", "model")}
+    payload = json.dumps(definition, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def env_file_paths(env_name):
+    env_dir = os.path.join(os.getcwd(), 'env')
+    return os.path.join(env_dir, f'.env.{env_name}'), os.path.join(env_dir, f'.env.{env_name}.user')
+
+def load_env_settings(env_name, api_key):
+    """Read the settings of one environment; the .user file wins over the shared file, process env is the fallback."""
+    values = {}
+    for path in env_file_paths(env_name):
+        if os.path.exists(path):
+            values.update({key: value for key, value in dotenv_values(path).items() if value})
+
+    def get(key):
+        return values.get(key) or os.getenv(key, "")
+
+    return {
+        "api_key": api_key or get("SECRET_AZURE_OPENAI_API_KEY") or get("AZURE_OPENAI_API_KEY"),
+        "endpoint": get("AZURE_OPENAI_ENDPOINT"),
+        "model": get("AZURE_OPENAI_MODEL_DEPLOYMENT_NAME"),
+        "assistant_id": get("AZURE_OPENAI_ASSISTANT_ID"),
+    }
+
+def load_results(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable result file {path}: {e}")
+        return {}
+    environments = data.get("environments") if isinstance(data, dict) else None
+    if not isinstance(environments, dict):
+        print(f"Ignoring unreadable result file {path}: unexpected format")
+        return {}
+    return environments
+
+def save_results(path, environments):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"environments": environments}, f, indent=4, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+async def find_assistant(client, env_name, configured_id, digest):
+    """Return (assistant, matches_hash) for this environment, preferring the configured ID, then a hash match, then a name match.
+
+    Assistants tagged with another environment are never returned. An untagged assistant is only
+    accepted when its ID is explicitly configured for this environment.
+    """
+    if configured_id:
+        try:
+            assistant = await client.beta.assistants.retrieve(configured_id)
+        except NotFoundError:
+            print(f"[{env_name}] Configured assistant {configured_id} was not found, searching by definition")
+        else:
+            metadata = assistant.metadata or {}
+            owner = metadata.get(ENV_METADATA_KEY)
+            if owner and owner != env_name:
+                raise ValueError(f"Configured assistant {configured_id} belongs to environment '{owner}'")
+            return assistant, owner == env_name and metadata.get(HASH_METADATA_KEY) == digest
+
+    candidate = None
+    async for assistant in client.beta.assistants.list(limit=100):
+        metadata = assistant.metadata or {}
+        if metadata.get(ENV_METADATA_KEY) != env_name:
+            continue
+        if metadata.get(HASH_METADATA_KEY) == digest:
+            return assistant, True
+        if candidate is None and metadata.get(NAME_METADATA_KEY) == ASSISTANT_NAME:
+            candidate = assistant
+    return candidate, False
+
+async def sync_environment(env_name, settings, previous, force):
+    options = build_options(settings["model"])
+    digest = definition_hash(options)
+    result = {
+        "assistant_id": previous.get("assistant_id", ""),
+        HASH_METADATA_KEY: digest,
+        "endpoint": settings["endpoint"],
+        "model": settings["model"],
+    }
+
+    # Nothing changed since the last sync of this environment, so skip the round trips entirely.
+    # Changes made outside this tool are not visible here; run with --force after those.
+    previous_id = previous.get("assistant_id")
+    if not force and previous_id and previous.get(HASH_METADATA_KEY) == digest \
+            and previous.get("endpoint") == settings["endpoint"] \
+            and settings["assistant_id"] in ("", previous_id):
+        result.update(assistant_id=previous_id, status="cached", synced_at=previous.get("synced_at"))
+        return result
+
+    if not settings["api_key"] or not settings["endpoint"] or not settings["model"]:
+        raise ValueError("API key, AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_MODEL_DEPLOYMENT_NAME are required")
+
+    options["metadata"] = {HASH_METADATA_KEY: digest, NAME_METADATA_KEY: ASSISTANT_NAME, ENV_METADATA_KEY: env_name}
+    client = AsyncAzureOpenAI(api_key=settings["api_key"], api_version=API_VERSION, azure_endpoint=settings["endpoint"])
+    try:
+        assistant, matches = await find_assistant(client, env_name, settings["assistant_id"], digest)
+        if assistant is not None and matches:
+            status = "unchanged"
+        elif assistant is not None:
+            assistant = await client.beta.assistants.update(assistant.id, **options)
+            status = "updated"
+        else:
+            assistant = await client.beta.assistants.create(**options)
+            status = "created"
+    finally:
+        await client.close()
+
+    result.update(assistant_id=assistant.id, status=status, synced_at=int(time.time()))
+    return result
+
+async def main():
+    args = load_keys_from_args()
+    previous_results = load_results(args.output)
+    semaphore = asyncio.Semaphore(max(1, args.concurrency))
+
+    async def run(env_name):
+        async with semaphore:
+            settings = load_env_settings(env_name, args.api_key)
+            try:
+                return env_name, await sync_environment(env_name, settings, previous_results.get(env_name, {}), args.force)
+            except Exception as e:
+                print(f"[{env_name}] Failed to sync assistant: {e}", file=sys.stderr)
+                return env_name, {**previous_results.get(env_name, {}), "status": "failed", "error": str(e)}
+
+    # Each environment only touches assistants tagged with its own name, so they can run concurrently.
+    env_names = list(dict.fromkeys(args.env))
+    results = dict(await asyncio.gather(*(run(env_name) for env_name in env_names)))
+
+    for env_name, result in results.items():
+        print(f"[{env_name}] {result['status']}: assistant ID {result.get('assistant_id') or '-'}")
+        if args.write_env and result.get("assistant_id") and result["status"] != "failed":
+            user_env_path = env_file_paths(env_name)[1]
+            os.makedirs(os.path.dirname(user_env_path), exist_ok=True)
+            open(user_env_path, "a").close()
+            set_key(user_env_path, "AZURE_OPENAI_ASSISTANT_ID", result["assistant_id"], quote_mode="never")
+
+    save_results(args.output, {**previous_results, **results})
+    print(f"Wrote results to {args.output}")
+
+    if any(result["status"] == "failed" for result in results.values()):
+        sys.exit(1)
 
-asyncio.run(main())
\ No newline at end of file
+asyncio.run(main())